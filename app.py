@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import os
 import time
+import tempfile
 
 from database import Database
-from strava_client import StravaClient
+from strava_client import StravaClient, activity_to_record, is_private
 from auth import handle_authentication, refresh_token_if_needed
+from charts import (build_overview_figures, build_zone_figures, build_trend_figures,
+                    data_version, get_max_chart_points)
+from export import DATASETS, FORMATS, export
 
 # Page config
 st.set_page_config(
@@ -34,8 +37,8 @@ def sync_activities(athlete_id, progress_bar):
     latest_date = db.get_latest_activity_date(athlete_id)
     after = datetime.fromisoformat(latest_date) if latest_date else None
     
-    # Fetch activities
-    activities = list(strava.get_activities(after=after, limit=100))
+    # Fetch activities, skipping private ones (reconcile.py removes them too)
+    activities = [activity for activity in strava.get_activities(after=after, limit=100) if not is_private(activity)]
     total_activities = len(activities)
     
     if total_activities == 0:
@@ -51,41 +54,8 @@ def sync_activities(athlete_id, progress_bar):
         # Get detailed activity data
         detailed_activity = strava.get_activity_by_id(activity.id)
         
-        # Helper function to extract seconds from Duration objects
-        def get_total_seconds(duration_obj):
-            if duration_obj is None:
-                return 0
-            # Duration objects have total_seconds() method
-            if hasattr(duration_obj, 'total_seconds'):
-                return int(duration_obj.total_seconds())
-            # Fallback: if it's already an integer
-            elif isinstance(duration_obj, (int, float)):
-                return int(duration_obj)
-            # If it has seconds attribute (timedelta)
-            elif hasattr(duration_obj, 'seconds'):
-                return int(duration_obj.total_seconds())
-            else:
-                return 0
-        
         # Prepare activity data
-        activity_data = {
-            'id': detailed_activity.id,
-            'athlete_id': athlete_id,
-            'name': detailed_activity.name,
-            'sport_type': str(detailed_activity.sport_type),
-            'start_date': detailed_activity.start_date_local.isoformat(),
-            'distance': float(detailed_activity.distance),
-            'moving_time': get_total_seconds(detailed_activity.moving_time),
-            'elapsed_time': get_total_seconds(detailed_activity.elapsed_time),
-            'total_elevation_gain': float(detailed_activity.total_elevation_gain) if detailed_activity.total_elevation_gain else 0,
-            'average_heartrate': detailed_activity.average_heartrate if hasattr(detailed_activity, 'average_heartrate') else None,
-            'max_heartrate': detailed_activity.max_heartrate if hasattr(detailed_activity, 'max_heartrate') else None,
-            'average_speed': float(detailed_activity.average_speed) if detailed_activity.average_speed else 0,
-            'max_speed': float(detailed_activity.max_speed) if detailed_activity.max_speed else 0,
-            'average_watts': detailed_activity.average_watts if hasattr(detailed_activity, 'average_watts') else None,
-            'kilojoules': detailed_activity.kilojoules if hasattr(detailed_activity, 'kilojoules') else None,
-            'description': detailed_activity.description if detailed_activity.description else None
-        }
+        activity_data = activity_to_record(detailed_activity, athlete_id)
         
         # Save activity
         db.upsert_activity(activity_data)
@@ -108,6 +78,54 @@ def sync_activities(athlete_id, progress_bar):
     
     st.success(f"Successfully synced {total_activities} activities!")
 
+def render_export(athlete_id):
+    """Export controls: stream the selection to a temp file, then offer it for download"""
+    with st.expander("⬇️ Export data"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            scope = st.radio("Athletes", ["This athlete", "Whole group"], key="export_scope")
+        with col2:
+            dataset = st.selectbox("Dataset", list(DATASETS), key="export_dataset")
+        with col3:
+            fmt = st.selectbox("Format", list(FORMATS), key="export_format")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start_date = st.date_input("From", value=None, key="export_start_date")
+        with col2:
+            end_date = st.date_input("Before", value=None, key="export_end_date")
+        with col3:
+            sport_types = st.text_input("Sport types (comma separated)", key="export_sport_types")
+        
+        # The download is only offered in the run that prepared it, so later reruns never
+        # re-read the file and a different athlete's export is never shown
+        if st.button("Prepare export"):
+            filters = dict(
+                athlete_id=athlete_id if scope == "This athlete" else None,
+                start_date=start_date.isoformat() if start_date else None,
+                end_date=end_date.isoformat() if end_date else None,
+                sport_types=[t.strip() for t in sport_types.split(',') if t.strip()] or None
+            )
+            # Written incrementally to disk so database pages never accumulate in memory
+            with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as tmp:
+                path = tmp.name
+            try:
+                with st.spinner("Exporting..."):
+                    if fmt == 'csv':
+                        with open(path, 'w', newline='', encoding='utf-8') as out:
+                            total = export(dataset, fmt, out, **filters)
+                    else:
+                        total = export(dataset, fmt, path, **filters)
+                
+                st.caption(f"{total} rows ready")
+                with open(path, 'rb') as exported:
+                    st.download_button("Download", exported, file_name=f"{dataset}.{fmt}")
+            except Exception as e:
+                st.error(f"Export failed: {str(e)}")
+            finally:
+                # Streamlit holds its own copy once the button is rendered
+                os.remove(path)
+
 def main():
     st.title("🏃‍♂️ Bourbon Chasers Strava Tracker")
     
@@ -169,6 +187,10 @@ def main():
             activities_df['moving_time_hours'] = activities_df['moving_time'] / 3600
             activities_df['average_speed_kmh'] = activities_df['average_speed'] * 3.6
             
+            # Figures are cached per athlete, data version and chart parameters
+            activities_version = data_version(activities_df)
+            max_chart_points = get_max_chart_points()
+            
             # Display metrics
             col1, col2, col3, col4 = st.columns(4)
             
@@ -195,37 +217,20 @@ def main():
             tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "❤️ Heart Rate Zones", "📈 Trends", "📋 Activities List"])
             
             with tab1:
+                pie_fig, bar_fig, heatmap_fig = build_overview_figures(athlete_id, activities_version, activities_df)
+                
                 # Activity type distribution
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    activity_counts = activities_df['sport_type'].value_counts()
-                    fig = px.pie(values=activity_counts.values, names=activity_counts.index, 
-                                title="Activity Types Distribution")
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(pie_fig, use_container_width=True)
                 
                 with col2:
                     # Distance by activity type
-                    distance_by_type = activities_df.groupby('sport_type')['distance_km'].sum().sort_values(ascending=True)
-                    fig = px.bar(x=distance_by_type.values, y=distance_by_type.index, 
-                                orientation='h', title="Distance by Activity Type")
-                    fig.update_layout(xaxis_title="Distance (km)", yaxis_title="Activity Type")
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(bar_fig, use_container_width=True)
                 
                 # Weekly activity pattern
-                activities_df['weekday'] = activities_df['start_date'].dt.day_name()
-                activities_df['hour'] = activities_df['start_date'].dt.hour
-                
-                weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                heatmap_data = activities_df.groupby(['weekday', 'hour']).size().reset_index(name='count')
-                heatmap_pivot = heatmap_data.pivot(index='weekday', columns='hour', values='count').fillna(0)
-                heatmap_pivot = heatmap_pivot.reindex(weekday_order)
-                
-                fig = px.imshow(heatmap_pivot, 
-                              labels=dict(x="Hour of Day", y="Day of Week", color="Activities"),
-                              title="Activity Heatmap by Day and Hour",
-                              color_continuous_scale="Blues")
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(heatmap_fig, use_container_width=True)
             
             with tab2:
                 # Heart Rate Zone Analysis
@@ -267,40 +272,14 @@ def main():
                         hr_zones_df['start_date'] = pd.to_datetime(hr_zones_df['start_date'])
                         hr_zones_df = hr_zones_df.sort_values('start_date', ascending=False)
                         
-                        # Calculate total time in each zone
-                        zone_totals = {
-                            'Zone 1 (Recovery)': hr_zones_df['zone_1_time'].sum() / 3600,
-                            'Zone 2 (Endurance)': hr_zones_df['zone_2_time'].sum() / 3600,
-                            'Zone 3 (Tempo)': hr_zones_df['zone_3_time'].sum() / 3600,
-                            'Zone 4 (Threshold)': hr_zones_df['zone_4_time'].sum() / 3600,
-                            'Zone 5 (VO2 Max)': hr_zones_df['zone_5_time'].sum() / 3600
-                        }
+                        zone_pie_fig, zone_area_fig = build_zone_figures(athlete_id, data_version(hr_zones_df),
+                                                                        max_chart_points, hr_zones_df)
                         
                         # Zone distribution pie chart
-                        fig = px.pie(values=list(zone_totals.values()), names=list(zone_totals.keys()),
-                                    title="Total Time in Each Heart Rate Zone (hours)")
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(zone_pie_fig, use_container_width=True)
                         
                         # Zone distribution over time
-                        hr_zones_df_sorted = hr_zones_df.sort_values('start_date')  # Sort ascending for time series
-                        
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatter(x=hr_zones_df_sorted['start_date'], y=hr_zones_df_sorted['zone_1_time']/60, 
-                                               name='Zone 1', stackgroup='one'))
-                        fig.add_trace(go.Scatter(x=hr_zones_df_sorted['start_date'], y=hr_zones_df_sorted['zone_2_time']/60, 
-                                               name='Zone 2', stackgroup='one'))
-                        fig.add_trace(go.Scatter(x=hr_zones_df_sorted['start_date'], y=hr_zones_df_sorted['zone_3_time']/60, 
-                                               name='Zone 3', stackgroup='one'))
-                        fig.add_trace(go.Scatter(x=hr_zones_df_sorted['start_date'], y=hr_zones_df_sorted['zone_4_time']/60, 
-                                               name='Zone 4', stackgroup='one'))
-                        fig.add_trace(go.Scatter(x=hr_zones_df_sorted['start_date'], y=hr_zones_df_sorted['zone_5_time']/60, 
-                                               name='Zone 5', stackgroup='one'))
-                        
-                        fig.update_layout(title="Heart Rate Zone Distribution Over Time",
-                                        xaxis_title="Date",
-                                        yaxis_title="Time (minutes)",
-                                        hovermode='x unified')
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(zone_area_fig, use_container_width=True)
                     else:
                         st.info("No heart rate zone data available. Make sure to sync activities with heart rate data.")
                 
@@ -322,28 +301,21 @@ def main():
                     'id': 'count'
                 }).rename(columns={'id': 'activity_count'})
                 
+                distance_fig, speed_fig, heartrate_fig = build_trend_figures(athlete_id, activities_version,
+                                                                             max_chart_points, weekly_stats)
+                
                 # Distance trend
-                fig = px.line(weekly_stats, y='distance_km', 
-                            title="Weekly Distance Trend",
-                            labels={'distance_km': 'Distance (km)', 'start_date': 'Week'})
-                fig.add_scatter(y=weekly_stats['distance_km'], mode='markers', name='Weekly Distance')
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(distance_fig, use_container_width=True)
                 
                 # Average speed and heart rate trends
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    fig = px.line(weekly_stats, y='average_speed_kmh',
-                                title="Average Speed Trend",
-                                labels={'average_speed_kmh': 'Speed (km/h)', 'start_date': 'Week'})
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(speed_fig, use_container_width=True)
                 
                 with col2:
-                    if weekly_stats['average_heartrate'].notna().any():
-                        fig = px.line(weekly_stats, y='average_heartrate',
-                                    title="Average Heart Rate Trend",
-                                    labels={'average_heartrate': 'Heart Rate (bpm)', 'start_date': 'Week'})
-                        st.plotly_chart(fig, use_container_width=True)
+                    if heartrate_fig is not None:
+                        st.plotly_chart(heartrate_fig, use_container_width=True)
             
             with tab4:
                 # Activities list
@@ -372,6 +344,8 @@ def main():
                                     'Elevation (m)']
                 
                 st.dataframe(display_df, use_container_width=True, hide_index=True)
+                
+                render_export(athlete_id)
         else:
             st.info("No activities found. Click 'Sync Activities' to fetch your data from Strava.")
     else:
@@ -0,0 +1,178 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+DEFAULT_MAX_CHART_POINTS = 500
+
+def get_max_chart_points():
+    """Max points per time series sent to the browser"""
+    # Try to get from Streamlit secrets first, then from environment
+    try:
+        value = st.secrets["MAX_CHART_POINTS"]
+    except (KeyError, AttributeError, FileNotFoundError):
+        value = os.getenv('MAX_CHART_POINTS', DEFAULT_MAX_CHART_POINTS)
+    return max(int(value), 3)
+
+def data_version(df):
+    """Content hash of a dataframe, used as the cache key for its figures"""
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of the points to keep"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket edges for the interior points; first and last are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return indices
+
+def average_windows(series, max_points):
+    """Average consecutive points into max_points equal windows; a window with no values stays a gap"""
+    positions = np.arange(len(series)) * max_points // len(series)
+    starts = np.flatnonzero(np.diff(positions, prepend=-1))
+    means = series.groupby(positions).mean().to_numpy()
+    return pd.Series(means, index=series.index[starts], name=series.name)
+
+def downsample_series(series, max_points):
+    """LTTB-downsample a datetime-indexed series to at most max_points, keeping gaps for missing values"""
+    if len(series) <= max_points:
+        return series
+
+    # One NaN is kept per run of missing values, so those runs come out of the LTTB budget
+    is_gap = series.isna()
+    gap_runs = int((is_gap & ~is_gap.shift(fill_value=False)).sum())
+    budget = max_points - gap_runs
+    if budget < 3:
+        # Too many gaps to keep each one
+        return average_windows(series, max_points)
+
+    valid = series.dropna()
+    if len(valid) > budget:
+        x = valid.index.asi8 if isinstance(valid.index, pd.DatetimeIndex) else valid.index.to_numpy()
+        valid = valid.iloc[lttb_indices(x, valid.to_numpy(), budget)]
+    # Keep one NaN per run of missing values so the line still breaks there
+    combined = series[series.index.isin(valid.index) | is_gap]
+    combined_gap = combined.isna()
+    return combined[~(combined_gap & combined_gap.shift(fill_value=False))]
+
+def bucket_by_time(df, time_column, value_columns, max_points):
+    """Sum value columns into equal time windows so at most max_points remain
+
+    Windows with no activities are kept as zero rows so the stacked areas drop to zero there.
+    """
+    if len(df) <= max_points:
+        return df[[time_column] + value_columns]
+    span = df[time_column].max() - df[time_column].min()
+    # Windows start at the first activity, so span / (max_points - 1) rounded up gives at most max_points
+    window = max(span / (max_points - 1), pd.Timedelta(seconds=1)).ceil('s')
+    bucketed = df.resample(window, on=time_column, origin='start')[value_columns].sum()
+    return bucketed.reset_index()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_overview_figures(athlete_id, version, _activities_df):
+    """Activity type pie, distance by type bar and day/hour heatmap"""
+    activities_df = _activities_df
+
+    activity_counts = activities_df['sport_type'].value_counts()
+    pie = px.pie(values=activity_counts.values, names=activity_counts.index,
+                 title="Activity Types Distribution")
+
+    distance_by_type = activities_df.groupby('sport_type')['distance_km'].sum().sort_values(ascending=True)
+    bar = px.bar(x=distance_by_type.values, y=distance_by_type.index,
+                 orientation='h', title="Distance by Activity Type")
+    bar.update_layout(xaxis_title="Distance (km)", yaxis_title="Activity Type")
+
+    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    heatmap_data = pd.DataFrame({
+        'weekday': activities_df['start_date'].dt.day_name(),
+        'hour': activities_df['start_date'].dt.hour
+    }).groupby(['weekday', 'hour']).size().reset_index(name='count')
+    heatmap_pivot = heatmap_data.pivot(index='weekday', columns='hour', values='count').fillna(0)
+    heatmap_pivot = heatmap_pivot.reindex(weekday_order)
+
+    heatmap = px.imshow(heatmap_pivot,
+                        labels=dict(x="Hour of Day", y="Day of Week", color="Activities"),
+                        title="Activity Heatmap by Day and Hour",
+                        color_continuous_scale="Blues")
+
+    return pie, bar, heatmap
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_zone_figures(athlete_id, version, max_points, _hr_zones_df):
+    """Zone totals pie and stacked zone area over time"""
+    hr_zones_df = _hr_zones_df
+    zone_columns = ['zone_1_time', 'zone_2_time', 'zone_3_time', 'zone_4_time', 'zone_5_time']
+
+    # Calculate total time in each zone
+    zone_totals = {
+        'Zone 1 (Recovery)': hr_zones_df['zone_1_time'].sum() / 3600,
+        'Zone 2 (Endurance)': hr_zones_df['zone_2_time'].sum() / 3600,
+        'Zone 3 (Tempo)': hr_zones_df['zone_3_time'].sum() / 3600,
+        'Zone 4 (Threshold)': hr_zones_df['zone_4_time'].sum() / 3600,
+        'Zone 5 (VO2 Max)': hr_zones_df['zone_5_time'].sum() / 3600
+    }
+    pie = px.pie(values=list(zone_totals.values()), names=list(zone_totals.keys()),
+                 title="Total Time in Each Heart Rate Zone (hours)")
+
+    # Stacked traces must share x values, so bucket by time window rather than LTTB per trace
+    zones_over_time = bucket_by_time(hr_zones_df.sort_values('start_date'), 'start_date', zone_columns, max_points)
+
+    area = go.Figure()
+    for zone_number, column in enumerate(zone_columns, start=1):
+        area.add_trace(go.Scatter(x=zones_over_time['start_date'], y=zones_over_time[column]/60,
+                                  name=f'Zone {zone_number}', stackgroup='one'))
+    area.update_layout(title="Heart Rate Zone Distribution Over Time",
+                       xaxis_title="Date",
+                       yaxis_title="Time (minutes)",
+                       hovermode='x unified')
+
+    return pie, area
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_trend_figures(athlete_id, version, max_points, _weekly_stats):
+    """Weekly distance, speed and heart rate trend lines"""
+    weekly_stats = _weekly_stats
+
+    distance = downsample_series(weekly_stats['distance_km'], max_points)
+    distance_fig = px.line(x=distance.index, y=distance.values,
+                           title="Weekly Distance Trend",
+                           labels={'x': 'Week', 'y': 'Distance (km)'})
+    distance_fig.add_scatter(x=distance.index, y=distance.values, mode='markers', name='Weekly Distance')
+
+    speed = downsample_series(weekly_stats['average_speed_kmh'], max_points)
+    speed_fig = px.line(x=speed.index, y=speed.values,
+                        title="Average Speed Trend",
+                        labels={'x': 'Week', 'y': 'Speed (km/h)'})
+
+    heartrate_fig = None
+    if weekly_stats['average_heartrate'].notna().any():
+        heartrate = downsample_series(weekly_stats['average_heartrate'], max_points)
+        heartrate_fig = px.line(x=heartrate.index, y=heartrate.values,
+                                title="Average Heart Rate Trend",
+                                labels={'x': 'Week', 'y': 'Heart Rate (bpm)'})
+
+    return distance_fig, speed_fig, heartrate_fig
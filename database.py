@@ -49,4 +49,69 @@ class Database:
         result = self.supabase.table('activities').select('start_date').eq('athlete_id', athlete_id).order('start_date', desc=True).limit(1).execute()
         if result.data:
             return result.data[0]['start_date']
-        return None
\ No newline at end of file
+        return None
+    
+    def get_activity_fingerprints(self, athlete_id, page_size=1000):
+        """Get (id, elapsed_time, name) for all of an athlete's activities, paged by id"""
+        rows = []
+        last_id = 0
+        while True:
+            result = self.supabase.table('activities').select('id, elapsed_time, name').eq('athlete_id', athlete_id).gt('id', last_id).order('id').limit(page_size).execute()
+            # A short page isn't the end: PostgREST's max_rows may cap pages below page_size
+            if not result.data:
+                return rows
+            rows.extend(result.data)
+            last_id = result.data[-1]['id']
+    
+    def delete_activities(self, activity_ids):
+        """Delete activities and their heart rate zones by ID"""
+        if not activity_ids:
+            return None
+        self.supabase.table('heart_rate_zones').delete().in_('activity_id', activity_ids).execute()
+        return self.supabase.table('activities').delete().in_('id', activity_ids).execute()
+    
+    def delete_heart_rate_zones(self, activity_id):
+        """Delete heart rate zones for an activity"""
+        return self.supabase.table('heart_rate_zones').delete().eq('activity_id', activity_id).execute()
+    
+    def iter_activities(self, columns, athlete_id=None, start_date=None, end_date=None, sport_types=None, page_size=1000):
+        """Yield pages of activities, keyset-paginated by id with filters applied in the database"""
+        last_id = 0
+        while True:
+            query = self.supabase.table('activities').select(columns).gt('id', last_id)
+            if athlete_id is not None:
+                query = query.eq('athlete_id', athlete_id)
+            if start_date:
+                query = query.gte('start_date', start_date)
+            if end_date:
+                query = query.lt('start_date', end_date)
+            if sport_types:
+                query = query.in_('sport_type', sport_types)
+            result = query.order('id').limit(page_size).execute()
+            # A short page isn't the end: PostgREST's max_rows may cap pages below page_size
+            if not result.data:
+                return
+            yield result.data
+            last_id = result.data[-1]['id']
+    
+    def iter_heart_rate_zones(self, athlete_id=None, start_date=None, end_date=None, sport_types=None, page_size=1000):
+        """Yield pages of heart rate zones joined to their activity, keyset-paginated by activity_id"""
+        last_id = 0
+        while True:
+            query = self.supabase.table('heart_rate_zones').select(
+                "*, activities!inner(athlete_id, sport_type, start_date)"
+            ).gt('activity_id', last_id)
+            if athlete_id is not None:
+                query = query.eq('activities.athlete_id', athlete_id)
+            if start_date:
+                query = query.gte('activities.start_date', start_date)
+            if end_date:
+                query = query.lt('activities.start_date', end_date)
+            if sport_types:
+                query = query.in_('activities.sport_type', sport_types)
+            result = query.order('activity_id').limit(page_size).execute()
+            # A short page isn't the end: PostgREST's max_rows may cap pages below page_size
+            if not result.data:
+                return
+            yield result.data
+            last_id = result.data[-1]['activity_id']
@@ -0,0 +1,120 @@
+import argparse
+import csv
+import sys
+
+from database import Database
+
+# Exported columns and their types; an explicit schema keeps every Parquet row group consistent
+ACTIVITY_FIELDS = [
+    ('id', 'int'),
+    ('athlete_id', 'int'),
+    ('name', 'string'),
+    ('sport_type', 'string'),
+    ('start_date', 'string'),
+    ('distance', 'float'),
+    ('moving_time', 'int'),
+    ('elapsed_time', 'int'),
+    ('total_elevation_gain', 'float'),
+    ('average_heartrate', 'float'),
+    ('max_heartrate', 'float'),
+    ('average_speed', 'float'),
+    ('max_speed', 'float'),
+    ('average_watts', 'float'),
+    ('kilojoules', 'float'),
+    ('description', 'string'),
+]
+
+HEART_RATE_ZONE_FIELDS = [
+    ('activity_id', 'int'),
+    ('athlete_id', 'int'),
+    ('sport_type', 'string'),
+    ('start_date', 'string'),
+    ('zone_1_time', 'float'),
+    ('zone_2_time', 'float'),
+    ('zone_3_time', 'float'),
+    ('zone_4_time', 'float'),
+    ('zone_5_time', 'float'),
+]
+
+DATASETS = ('activities', 'heart_rate_zones')
+FORMATS = ('csv', 'parquet')
+
+def iter_pages(db, dataset, athlete_id=None, start_date=None, end_date=None, sport_types=None):
+    """Yield pages of flat row dicts for a dataset, one database page at a time"""
+    if dataset == 'activities':
+        columns = ', '.join(name for name, _ in ACTIVITY_FIELDS)
+        for page in db.iter_activities(columns, athlete_id, start_date, end_date, sport_types):
+            yield page
+    elif dataset == 'heart_rate_zones':
+        for page in db.iter_heart_rate_zones(athlete_id, start_date, end_date, sport_types):
+            # Flatten the joined activity columns
+            yield [{**{k: v for k, v in row.items() if k != 'activities'}, **row['activities']} for row in page]
+    else:
+        raise ValueError(f"Unknown dataset: {dataset}")
+
+def get_fields(dataset):
+    """Column spec for a dataset"""
+    return ACTIVITY_FIELDS if dataset == 'activities' else HEART_RATE_ZONE_FIELDS
+
+def write_csv(pages, fields, out):
+    """Write pages to a text stream as CSV, one page at a time"""
+    writer = csv.DictWriter(out, fieldnames=[name for name, _ in fields], extrasaction='ignore')
+    writer.writeheader()
+    total = 0
+    for page in pages:
+        writer.writerows(page)
+        total += len(page)
+    return total
+
+def write_parquet(pages, fields, out):
+    """Write pages to a path or binary stream as Parquet, one row group per page"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'int': pa.int64(), 'float': pa.float64(), 'string': pa.string()}
+    schema = pa.schema([(name, types[kind]) for name, kind in fields])
+
+    total = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for page in pages:
+            writer.write_table(pa.Table.from_pylist(page, schema=schema))
+            total += len(page)
+    return total
+
+def export(dataset, fmt, out, athlete_id=None, start_date=None, end_date=None, sport_types=None):
+    """Stream a dataset to `out` in the given format and return the number of rows written"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    db = Database()
+    pages = iter_pages(db, dataset, athlete_id, start_date, end_date, sport_types)
+    if fmt == 'csv':
+        return write_csv(pages, get_fields(dataset), out)
+    return write_parquet(pages, get_fields(dataset), out)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Bourbon Chasers activity data to CSV or Parquet")
+    parser.add_argument('dataset', choices=DATASETS)
+    parser.add_argument('output', help="Output file path, or - for stdout (CSV only)")
+    parser.add_argument('--format', choices=FORMATS, help="Defaults to the output file extension, else csv")
+    parser.add_argument('--athlete-id', type=int, help="Export a single athlete (default: whole group)")
+    parser.add_argument('--start-date', help="Include activities on or after this ISO date")
+    parser.add_argument('--end-date', help="Include activities before this ISO date")
+    parser.add_argument('--sport-type', action='append', dest='sport_types', help="Repeat to include several sport types")
+    args = parser.parse_args()
+
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    filters = dict(athlete_id=args.athlete_id, start_date=args.start_date,
+                   end_date=args.end_date, sport_types=args.sport_types)
+
+    if args.output == '-':
+        if fmt != 'csv':
+            parser.error("Parquet output requires a file path")
+        total = export(args.dataset, fmt, sys.stdout, **filters)
+    elif fmt == 'csv':
+        with open(args.output, 'w', newline='', encoding='utf-8') as out:
+            total = export(args.dataset, fmt, out, **filters)
+    else:
+        total = export(args.dataset, fmt, args.output, **filters)
+
+    print(f"Exported {total} {args.dataset} rows", file=sys.stderr)
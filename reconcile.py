@@ -0,0 +1,161 @@
+import argparse
+import time
+import zlib
+
+from stravalib.exc import RateLimitExceeded
+
+from database import Database
+from strava_client import StravaClient, activity_to_record, get_total_seconds, is_private
+from auth import refresh_token_if_needed
+
+# Max IDs per delete request, keeps the PostgREST `in.(...)` filter URL short
+DELETE_BATCH_SIZE = 200
+
+# Summary activities per listing request (stravalib's page size)
+SUMMARY_PAGE_SIZE = 200
+
+# Default Strava requests per run: listing pages, token refreshes, detail and zone fetches
+# all count, leaving headroom under Strava's 100 requests per 15 minutes
+DEFAULT_MAX_REQUESTS = 90
+
+def name_hash(name):
+    """Compact, stable hash of an activity name"""
+    return zlib.crc32((name or '').encode('utf-8'))
+
+def strava_fingerprints(strava, max_pages):
+    """Map activity ID -> (elapsed_time, name hash) from Strava summary activities, skipping private ones
+
+    Returns (fingerprints, listing requests used). Fingerprints are None if the listing
+    needed more than max_pages requests, since a partial listing can't be diffed safely.
+    """
+    fingerprints = {}
+    listed = 0
+    for activity in strava.get_activity_summaries():
+        listed += 1
+        if not is_private(activity):
+            fingerprints[activity.id] = (get_total_seconds(activity.elapsed_time), name_hash(activity.name))
+        # Stop before the iterator requests another page the budget can't cover
+        if listed % SUMMARY_PAGE_SIZE == 0 and listed // SUMMARY_PAGE_SIZE >= max_pages:
+            return None, max_pages
+    # The listing ends on the first short page, so a full last page costs one extra request
+    return fingerprints, listed // SUMMARY_PAGE_SIZE + 1
+
+def database_fingerprints(db, athlete_id):
+    """Map activity ID -> (elapsed_time, name hash) from the activities table"""
+    return {
+        row['id']: (row['elapsed_time'] or 0, name_hash(row['name']))
+        for row in db.get_activity_fingerprints(athlete_id)
+    }
+
+def diff_fingerprints(remote, local):
+    """Return (ids_to_fetch, ids_to_delete) between Strava and the database, newest fetches first"""
+    to_fetch = sorted((activity_id for activity_id, marker in remote.items() if local.get(activity_id) != marker), reverse=True)
+    to_delete = sorted(local.keys() - remote.keys())
+    return to_fetch, to_delete
+
+def reconcile_athlete(athlete_id, dry_run=False, max_requests=DEFAULT_MAX_REQUESTS):
+    """Bring one athlete's activities in line with Strava, touching only rows that differ
+
+    Spends at most max_requests Strava requests. Changed activities are fetched newest first,
+    and the rest are picked up on later runs. Returns the number of requests used.
+    Raises RateLimitExceeded once Strava's quota is spent.
+    """
+    db = Database()
+    strava = StravaClient()
+
+    if max_requests < 2:
+        print(f"Athlete {athlete_id}: skipped, request budget exhausted")
+        return 0
+
+    stored_token = db.get_athlete(athlete_id).data['access_token']
+    access_token = refresh_token_if_needed(athlete_id)
+    used = 1 if access_token != stored_token else 0
+    athlete_data = db.get_athlete(athlete_id).data
+    strava.set_access_token(access_token, athlete_data['refresh_token'])
+
+    remote, listing_pages = strava_fingerprints(strava, max_requests - used)
+    used += listing_pages
+    if remote is None:
+        print(f"Athlete {athlete_id}: skipped, listing needs more than the remaining request budget")
+        return used
+
+    local = database_fingerprints(db, athlete_id)
+    to_fetch, to_delete = diff_fingerprints(remote, local)
+    print(f"Athlete {athlete_id}: {len(to_fetch)} to fetch, {len(to_delete)} to delete")
+
+    # An empty listing is more likely a bad response than every activity being deleted
+    if not remote and local:
+        print(f"Athlete {athlete_id}: Strava returned no activities, refusing to delete {len(local)} rows")
+        to_delete = []
+
+    if dry_run:
+        return used
+
+    for start in range(0, len(to_delete), DELETE_BATCH_SIZE):
+        db.delete_activities(to_delete[start:start + DELETE_BATCH_SIZE])
+
+    fetched = 0
+    for activity_id in to_fetch:
+        # A detail fetch plus a possible zones fetch
+        if max_requests - used < 2:
+            print(f"Athlete {athlete_id}: request budget reached, {len(to_fetch) - fetched} activities left for later runs")
+            break
+        fetched += 1
+        try:
+            # Failed requests still spend quota, so count them before they are made
+            used += 1
+            detailed_activity = strava.get_activity_by_id(activity_id)
+            db.upsert_activity(activity_to_record(detailed_activity, athlete_id))
+
+            if hasattr(detailed_activity, 'has_heartrate') and detailed_activity.has_heartrate:
+                used += 1
+                zones = strava.get_activity_zones(activity_id)
+                if zones:
+                    zones['activity_id'] = activity_id
+                    db.upsert_heart_rate_zones(zones)
+            else:
+                # Heart rate data was removed, drop the stale zones
+                db.delete_heart_rate_zones(activity_id)
+        except RateLimitExceeded:
+            print(f"Athlete {athlete_id}: Strava rate limit reached after {fetched - 1} activities")
+            raise
+        except Exception as e:
+            print(f"Athlete {athlete_id}: failed to reconcile activity {activity_id}: {e}")
+
+        # Same rate limit pacing as the dashboard sync
+        if fetched % 10 == 0:
+            time.sleep(5)
+        else:
+            time.sleep(1)
+
+    return used
+
+def reconcile_all(dry_run=False, max_requests=DEFAULT_MAX_REQUESTS):
+    """Reconcile every connected athlete within one shared request budget, continuing past individual failures"""
+    db = Database()
+    remaining = max_requests
+    for athlete in db.get_all_athletes().data:
+        try:
+            remaining -= reconcile_athlete(athlete['id'], dry_run=dry_run, max_requests=remaining)
+        except RateLimitExceeded:
+            print("Stopping reconciliation, rerun once the Strava quota resets")
+            return
+        except Exception as e:
+            print(f"Failed to reconcile athlete {athlete['id']}: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile stored activities with Strava")
+    parser.add_argument('athlete_id', type=int, nargs='?', help="Reconcile a single athlete (default: whole group)")
+    parser.add_argument('--dry-run', action='store_true', help="Report differences without changing anything")
+    parser.add_argument('--max-requests', type=int, default=DEFAULT_MAX_REQUESTS,
+                        help="Max Strava requests this run, counting listing pages, token refreshes and fetches")
+    args = parser.parse_args()
+
+    print("=== Strava Activity Reconciliation ===")
+    if args.athlete_id is not None:
+        try:
+            reconcile_athlete(args.athlete_id, dry_run=args.dry_run, max_requests=args.max_requests)
+        except RateLimitExceeded:
+            print("Stopping reconciliation, rerun once the Strava quota resets")
+    else:
+        reconcile_all(dry_run=args.dry_run, max_requests=args.max_requests)
@@ -1,11 +1,50 @@
 import os
 import time
 from stravalib.client import Client
+from stravalib.exc import RateLimitExceeded
 from dotenv import load_dotenv
 import streamlit as st
 
 load_dotenv()
 
+def get_total_seconds(duration_obj):
+    """Extract whole seconds from a stravalib Duration, timedelta or number"""
+    if duration_obj is None:
+        return 0
+    # Duration objects have total_seconds() method
+    if hasattr(duration_obj, 'total_seconds'):
+        return int(duration_obj.total_seconds())
+    # Fallback: if it's already an integer
+    elif isinstance(duration_obj, (int, float)):
+        return int(duration_obj)
+    else:
+        return 0
+
+def is_private(activity):
+    """True for activities visible only to their owner, which are never imported"""
+    return bool(getattr(activity, 'private', False)) or getattr(activity, 'visibility', None) == 'only_me'
+
+def activity_to_record(activity, athlete_id):
+    """Convert a detailed Strava activity into an `activities` table row"""
+    return {
+        'id': activity.id,
+        'athlete_id': athlete_id,
+        'name': activity.name,
+        'sport_type': str(activity.sport_type),
+        'start_date': activity.start_date_local.isoformat(),
+        'distance': float(activity.distance),
+        'moving_time': get_total_seconds(activity.moving_time),
+        'elapsed_time': get_total_seconds(activity.elapsed_time),
+        'total_elevation_gain': float(activity.total_elevation_gain) if activity.total_elevation_gain else 0,
+        'average_heartrate': activity.average_heartrate if hasattr(activity, 'average_heartrate') else None,
+        'max_heartrate': activity.max_heartrate if hasattr(activity, 'max_heartrate') else None,
+        'average_speed': float(activity.average_speed) if activity.average_speed else 0,
+        'max_speed': float(activity.max_speed) if activity.max_speed else 0,
+        'average_watts': activity.average_watts if hasattr(activity, 'average_watts') else None,
+        'kilojoules': activity.kilojoules if hasattr(activity, 'kilojoules') else None,
+        'description': activity.description if activity.description else None
+    }
+
 class StravaClient:
     def __init__(self):
         self.client = Client()
@@ -60,6 +99,10 @@ class StravaClient:
         """Get athlete activities"""
         return self.client.get_activities(after=after, limit=limit)
     
+    def get_activity_summaries(self, after=None):
+        """Iterate over every summary activity (paged 200 per request, no detail calls)"""
+        return self.client.get_activities(after=after, limit=None)
+    
     def get_activity_by_id(self, activity_id):
         """Get detailed activity data"""
         return self.client.get_activity(activity_id)
@@ -79,6 +122,9 @@ class StravaClient:
                         'zone_4_time': zone.distribution_buckets[3].time if len(zone.distribution_buckets) > 3 else 0,
                         'zone_5_time': zone.distribution_buckets[4].time if len(zone.distribution_buckets) > 4 else 0,
                     }
+        except RateLimitExceeded:
+            # Let callers stop instead of spending more quota
+            raise
         except Exception as e:
             print(f"Error fetching heart rate zones: {e}")
         
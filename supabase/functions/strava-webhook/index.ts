@@ -118,6 +118,15 @@ Deno.serve(async (req) => {
           const activity = await activityResponse.json()
           console.log('Fetched activity details:', activity.name, activity.type)
 
+          // Private activities are never imported (same rule as the Python sync and reconcile.py);
+          // an update that makes an activity private removes it
+          if (activity.private || activity.visibility === 'only_me') {
+            console.log('Removing private activity:', activity.id)
+            await supabase.from('heart_rate_zones').delete().eq('activity_id', activity.id)
+            await supabase.from('activities').delete().eq('id', activity.id)
+            return new Response('OK', { headers: corsHeaders })
+          }
+
           // Helper function to extract seconds from duration
           const getTotalSeconds = (duration: any): number => {
             if (duration === null || duration === undefined) return 0